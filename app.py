@@ -1,12 +1,36 @@
 import json
-from typing import Any, Dict, List, Tuple, Union
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import orjson
 import pandas as pd
 import streamlit as st
+import xxhash
+
+try:
+	# Optional: compiled canonicalization kernels, built with `cythonize -i canon.pyx`
+	from canon import canon_bytes, canon_hash
+except ImportError:
+	canon_bytes = canon_hash = None
+
+try:
+	# Optional: vectorized diffing of large record lists
+	import polars as pl
+except ImportError:
+	pl = None
 
 JsonType = Union[Dict[str, Any], List[Any], str, int, float, bool, None]
 
+# Seeds distinguishing container kinds in canonical_hash; list sums wrap at 64 bits
+_DICT_HASH_SEED = 0x64
+_LIST_HASH_SEED = 0x6C
+_HASH_MASK = (1 << 64) - 1
+
+# Record lists at least this long (both sides together) are diffed column-wise with polars
+COLUMNAR_MIN_RECORDS = 1000
+_POLARS_TYPES = {str: pl.String, int: pl.Int64, float: pl.Float64, bool: pl.Boolean} if pl is not None else {}
 
 @st.cache_data
 def try_load_json(text: str) -> Tuple[JsonType, str]:
@@ -23,6 +47,14 @@ def try_load_json(text: str) -> Tuple[JsonType, str]:
 			return None, f"Invalid JSON: {e}"
 
 
+def _dumps(value: JsonType) -> bytes:
+	try:
+		return orjson.dumps(value)
+	except Exception:
+		# orjson rejects e.g. integers wider than 64 bits; fall back to stdlib
+		return json.dumps(value, sort_keys=True).encode()
+
+
 def normalize_json(value: JsonType) -> JsonType:
 	"""
 	Produce a canonical, order-insensitive representation:
@@ -36,45 +68,134 @@ def normalize_json(value: JsonType) -> JsonType:
 		normalized_items = [normalize_json(v) for v in value]
 		# Sort lists by their stringified canonical form for order-insensitive comparison
 		try:
-			return sorted(normalized_items, key=lambda x: orjson.dumps(x))
+			return sorted(normalized_items, key=orjson.dumps)
 		except Exception:
-			return sorted(normalized_items, key=lambda x: json.dumps(x, sort_keys=True))
+			return sorted(normalized_items, key=_dumps)
 	return value
 
 
+def canon_key(value: JsonType) -> bytes:
+	"""Canonical serialized bytes of `value`"""
+	if canon_bytes is not None:
+		return canon_bytes(value)
+	return _dumps(normalize_json(value))
+
+
 @st.cache_data
 def cached_normalize_json(value: JsonType) -> JsonType:
 	return normalize_json(value)
 
 
-def deep_equal_ignore_order(a: JsonType, b: JsonType) -> bool:
-	return normalize_json(a) == normalize_json(b)
+def _dumps_sorted(value: JsonType) -> bytes:
+	try:
+		return orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+	except Exception:
+		return json.dumps(value, sort_keys=True).encode()
 
 
-def intersect_json(a: JsonType, b: JsonType) -> JsonType:
+def _scalar_list_bytes(value: List[JsonType], types: set) -> bytes:
+	"""Order-insensitive serialization of a list holding no containers"""
+	if len(types) == 1 and (str in types or int in types):
+		# Equal strs (or ints) are identical, so sorting the values themselves is canonical
+		try:
+			return orjson.dumps(sorted(value))
+		except Exception:
+			pass
+	# Sort the item serializations instead, which never contain a raw newline
+	return b"\n".join(sorted(map(_dumps, value)))
+
+
+def canonical_hash(value: JsonType, _cache: Optional[Dict[int, int]] = None) -> int:
+	"""
+	Order-insensitive 64-bit content hash:
+	- dicts: one key-sorted serialization, with lists and dicts that hold
+	  containers replaced by their own hashes alongside
+	- lists: commutative sum of item hashes, so no sorting is needed; lists
+	  of scalars sort their items' serializations instead
+	- scalars: hash of their JSON serialization
+
+	`_cache` memoizes container hashes by `id()` for the duration of a single comparison.
+	"""
+	if canon_hash is not None:
+		return canon_hash(value, _cache)
+	if not isinstance(value, (dict, list)):
+		try:
+			return xxhash.xxh3_64_intdigest(orjson.dumps(value))
+		except Exception:
+			return xxhash.xxh3_64_intdigest(_dumps(value))
+	if _cache is None:
+		_cache = {}
+	h = _cache.get(id(value))
+	if h is not None:
+		return h
+	if isinstance(value, dict):
+		types = set(map(type, value.values()))
+		if list in types or dict in types:
+			# Values serialized as-is (scalars and all-scalar dicts), then hashes of the rest
+			plain, hashed = {}, {}
+			for k, v in value.items():
+				if isinstance(v, list):
+					hashed[k] = canonical_hash(v, _cache)
+				elif isinstance(v, dict):
+					sub_types = set(map(type, v.values()))
+					if list in sub_types or dict in sub_types:
+						hashed[k] = canonical_hash(v, _cache)
+					else:
+						plain[k] = v
+				else:
+					plain[k] = v
+			payload = [plain, hashed]
+		else:
+			# All-scalar dicts, the common record shape, take a single serializer call
+			payload = value
+		h = xxhash.xxh3_64_intdigest(_dumps_sorted(payload), seed=_DICT_HASH_SEED)
+	else:
+		types = set(map(type, value))
+		if dict in types or list in types:
+			total = sum(canonical_hash(v, _cache) for v in value) & _HASH_MASK
+			h = xxhash.xxh3_64_intdigest(total.to_bytes(8, "little"), seed=_LIST_HASH_SEED)
+		else:
+			h = xxhash.xxh3_64_intdigest(_scalar_list_bytes(value, types), seed=_LIST_HASH_SEED)
+	_cache[id(value)] = h
+	return h
+
+
+def deep_equal_ignore_order(a: JsonType, b: JsonType, _cache: Optional[Dict[int, int]] = None) -> bool:
+	# JSON equality is type-strict: 1, 1.0 and true all serialize differently
+	if type(a) is not type(b):
+		return False
+	if not isinstance(a, (dict, list)):
+		return a == b
+	# A 64-bit collision between differing documents is astronomically unlikely
+	return canonical_hash(a, _cache) == canonical_hash(b, _cache)
+
+
+def intersect_json(a: JsonType, b: JsonType, _cache: Optional[Dict[int, int]] = None) -> JsonType:
 	"""
 	Compute the deepest common structure/values between a and b.
 	If types differ or values differ, returns None for that branch except for lists where
 	it returns the common elements (order-insensitive) based on canonical equality.
 	"""
+	if _cache is None:
+		_cache = {}
 	if isinstance(a, dict) and isinstance(b, dict):
 		common_keys = set(a.keys()) & set(b.keys())
 		result: Dict[str, JsonType] = {}
 		for k in sorted(common_keys):
-			sub = intersect_json(a[k], b[k])
+			sub = intersect_json(a[k], b[k], _cache)
 			if sub is not None:
 				result[k] = sub
 		return result if result else None
 
 	if isinstance(a, list) and isinstance(b, list):
-		# Order-insensitive intersection: match by canonical form
-		canon_to_items_a: Dict[bytes, List[JsonType]] = {}
+		# Order-insensitive intersection: match by canonical hash
+		canon_to_items_a: Dict[int, List[JsonType]] = {}
 		for item in a:
-			key = orjson.dumps(normalize_json(item))
+			key = canonical_hash(item, _cache)
 			canon_to_items_a.setdefault(key, []).append(item)
 		common: List[JsonType] = []
 		for item in b:
-			key = orjson.dumps(normalize_json(item))
+			key = canonical_hash(item, _cache)
 			if canon_to_items_a.get(key):
 				# consume one occurrence to handle duplicates correctly
 				canon_to_items_a[key].pop()
@@ -84,195 +205,332 @@ def intersect_json(a: JsonType, b: JsonType) -> JsonType:
 		return common if common else None
 
 	# Scalars or differing types
-	if deep_equal_ignore_order(a, b):
+	if deep_equal_ignore_order(a, b, _cache):
 		return a
 	return None
 
 
 @st.cache_data
-def cached_intersect_json(a_json: str, b_json: str) -> JsonType:
-	"""Cache intersection results based on JSON string representation"""
-	a = orjson.loads(a_json)
-	b = orjson.loads(b_json)
-	return intersect_json(a, b)
+def cached_intersect_json(key: int, _a: JsonType, _b: JsonType) -> JsonType:
+	"""Cache intersection results based on the comparison key (parsed inputs are not hashed)"""
+	return intersect_json(_a, _b)
 
 
-def diff_json(a: JsonType, b: JsonType, path: str = "$") -> Dict[str, Any]:
+def _records_multiset_diff(
+	a: List[JsonType], b: List[JsonType]
+) -> Optional[Tuple[List[Tuple[JsonType, int]], List[Tuple[JsonType, int]]]]:
+	"""
+	Multiset difference of two lists of flat records via polars group-by/join.
+	Returns (only_in_a, only_in_b) as (record, count) pairs, where each record
+	is the first matching item of the original list, or None when the lists
+	don't qualify: polars missing, too few records, differing key sets, or
+	columns that aren't a single scalar type (plus None) on both sides.
+	"""
+	if pl is None or len(a) + len(b) < COLUMNAR_MIN_RECORDS or not a or not b:
+		return None
+	first = a[0]
+	if not isinstance(first, dict) or not first:
+		return None
+	keys = set(first)
+	for record in (*a, *b):
+		if not isinstance(record, dict) or len(record) != len(keys) or not keys.issuperset(record):
+			return None
+
+	columns = list(first)
+	index_col, count_a_col, count_b_col = "__first", "__count_a", "__count_b"
+	if keys & {index_col, count_a_col, count_b_col}:
+		return None
+	schema = {}
+	for k in columns:
+		values = [r[k] for r in a] + [r[k] for r in b]
+		types = set(map(type, values)) - {type(None)}
+		if not types:
+			schema[k] = pl.Null
+			continue
+		if len(types) != 1:
+			return None
+		col_type = types.pop()
+		if col_type not in _POLARS_TYPES:
+			return None
+		if col_type is float and any(
+			v is not None and (v != v or (v == 0.0 and math.copysign(1.0, v) < 0)) for v in values
+		):
+			# polars matches -0.0 with 0.0 and NaN with NaN; leave those to the hash path
+			return None
+		schema[k] = _POLARS_TYPES[col_type]
+
+	try:
+		def counts(records: List[JsonType], count_col: str) -> "pl.DataFrame":
+			# Carry each group's first row index so the original item can be returned
+			return (
+				pl.from_dicts(records, schema=schema)
+				.with_row_index(index_col)
+				.group_by(columns, maintain_order=True)
+				.agg(pl.len().alias(count_col), pl.col(index_col).first())
+			)
+
+		counts_a, counts_b = counts(a, count_a_col), counts(b, count_b_col)
+
+		def only_in(
+			records: List[JsonType], left: "pl.DataFrame", right: "pl.DataFrame", left_col: str, right_col: str
+		) -> List[Tuple[JsonType, int]]:
+			extra = (
+				left.join(right.drop(index_col), on=columns, how="left", nulls_equal=True)
+				.sort(index_col)
+				.select(
+					index_col,
+					(pl.col(left_col).cast(pl.Int64) - pl.col(right_col).fill_null(0).cast(pl.Int64)).alias(left_col),
+				)
+				.filter(pl.col(left_col) > 0)
+			)
+			return [
+				(records[idx], count)
+				for idx, count in zip(extra.get_column(index_col).to_list(), extra.get_column(left_col).to_list())
+			]
+
+		return (
+			only_in(a, counts_a, counts_b, count_a_col, count_b_col),
+			only_in(b, counts_b, counts_a, count_b_col, count_a_col),
+		)
+	except Exception:
+		# e.g. integers outside the 64-bit range; the hash path handles them
+		return None
+
+
+def diff_json(
+	a: JsonType,
+	b: JsonType,
+	path: str = "$",
+	_cache: Optional[Dict[int, int]] = None,
+) -> Dict[str, Any]:
 	"""
 	Return a structured diff with:
-	- only_in_a: list of paths and values
-	- only_in_b: list of paths and values
-	- modified: list of paths with (a_value, b_value)
+	- only_in_a: list of (path, value, count, display_path) tuples
+	- only_in_b: list of (path, value, count, display_path) tuples
+	- modified: list of (path, a_value, b_value) tuples
 	Uses order-insensitive comparison for dicts and lists.
 	"""
+	if _cache is None:
+		_cache = {}
 	diffs = {"only_in_a": [], "only_in_b": [], "modified": []}
 
 	if isinstance(a, dict) and isinstance(b, dict):
 		keys_a, keys_b = set(a.keys()), set(b.keys())
 		for k in sorted(keys_a - keys_b):
-			diffs["only_in_a"].append({"path": f"{path}.{k}", "value": a[k]})
+			key_path = f"{path}.{k}"
+			diffs["only_in_a"].append((key_path, a[k], 1, key_path))
 		for k in sorted(keys_b - keys_a):
-			diffs["only_in_b"].append({"path": f"{path}.{k}", "value": b[k]})
+			key_path = f"{path}.{k}"
+			diffs["only_in_b"].append((key_path, b[k], 1, key_path))
 		for k in sorted(keys_a & keys_b):
 			sub_a, sub_b = a[k], b[k]
 			if isinstance(sub_a, (dict, list)) or isinstance(sub_b, (dict, list)):
-				sub_diffs = diff_json(sub_a, sub_b, f"{path}.{k}")
+				sub_diffs = diff_json(sub_a, sub_b, f"{path}.{k}", _cache)
 				for key in ("only_in_a", "only_in_b", "modified"):
 					diffs[key].extend(sub_diffs[key])
 			else:
-				if not deep_equal_ignore_order(sub_a, sub_b):
-					diffs["modified"].append({
-						"path": f"{path}.{k}",
-						"a": sub_a,
-						"b": sub_b,
-					})
+				if not deep_equal_ignore_order(sub_a, sub_b, _cache):
+					diffs["modified"].append((f"{path}.{k}", sub_a, sub_b))
 		return diffs
 
 	if isinstance(a, list) and isinstance(b, list):
-		# Compare as multisets based on canonical representation
-		def multiset_counts(lst: List[JsonType]) -> Dict[bytes, int]:
-			counts: Dict[bytes, int] = {}
-			for item in lst:
-				key = orjson.dumps(normalize_json(item))
-				counts[key] = counts.get(key, 0) + 1
-			return counts
-
-		counts_a = multiset_counts(a)
-		counts_b = multiset_counts(b)
+		list_path = path + "[]"
+
+		def entry(value: JsonType, count: int) -> Tuple[str, JsonType, int, str]:
+			# The table's display path is formatted once here rather than on every rerun
+			return (list_path, value, count, f"{list_path} (×{count})" if count > 1 else list_path)
+
+		columnar = _records_multiset_diff(a, b)
+		if columnar is not None:
+			only_a, only_b = columnar
+			for value, extra in only_a:
+				diffs["only_in_a"].append(entry(value, extra))
+			for value, extra in only_b:
+				diffs["only_in_b"].append(entry(value, extra))
+			return diffs
+
+		# Compare as multisets based on canonical hash, keeping one
+		# original item per key for display. Keys are plain 64-bit ints, which
+		# are smaller and cheaper to hash than any serialized form (JSON or
+		# msgpack) of the item.
+		def multiset_counts(lst: List[JsonType]) -> Tuple[Counter, Dict[int, JsonType]]:
+			keys = [canonical_hash(item, _cache) for item in lst]
+			# Reversed so the first occurrence of each key wins
+			samples = dict(zip(reversed(keys), reversed(lst)))
+			return Counter(keys), samples
+
+		counts_a, samples_a = multiset_counts(a)
+		counts_b, samples_b = multiset_counts(b)
 
 		# Items only in a
-		for key, cnt in counts_a.items():
-			extra = cnt - counts_b.get(key, 0)
-			if extra > 0:
-				try:
-					value = orjson.loads(key)
-				except Exception:
-					value = json.loads(key)
-				diffs["only_in_a"].append({"path": path + "[]", "value": value, "count": extra})
+		for key, extra in (counts_a - counts_b).items():
+			diffs["only_in_a"].append(entry(samples_a[key], extra))
 
 		# Items only in b
-		for key, cnt in counts_b.items():
-			extra = cnt - counts_a.get(key, 0)
-			if extra > 0:
-				try:
-					value = orjson.loads(key)
-				except Exception:
-					value = json.loads(key)
-				diffs["only_in_b"].append({"path": path + "[]", "value": value, "count": extra})
+		for key, extra in (counts_b - counts_a).items():
+			diffs["only_in_b"].append(entry(samples_b[key], extra))
 
 		# No modified entries at list level; modifications are caught inside dict elements
 		return diffs
 
 	# Different types or scalars
-	if not deep_equal_ignore_order(a, b):
-		diffs["modified"].append({"path": path, "a": a, "b": b})
+	if not deep_equal_ignore_order(a, b, _cache):
+		diffs["modified"].append((path, a, b))
 	return diffs
 
 
 @st.cache_data
-def cached_diff_json(a_json: str, b_json: str) -> Dict[str, Any]:
-	"""Cache diff results based on JSON string representation"""
-	a = orjson.loads(a_json)
-	b = orjson.loads(b_json)
-	return diff_json(a, b)
-
-
-def similarity_score(a: JsonType, b: JsonType) -> float:
+def cached_diff_json(key: int, _a: JsonType, _b: JsonType) -> Dict[str, Any]:
+	"""Cache diff results based on the comparison key (parsed inputs are not hashed)"""
+	return diff_json(_a, _b)
+
+
+def byte_bigrams(s: bytes) -> np.ndarray:
+	"""Sorted unique byte bigrams of `s`, each packed into one integer"""
+	arr = np.frombuffer(s, dtype=np.uint8).astype(np.uint32)
+	if arr.size < 2:
+		# A lone byte is its own gram; offset it so it never equals a real bigram
+		return arr | 0x10000
+	return np.unique(arr[:-1] | (arr[1:] << 8))
+
+
+def similarity_score(
+	ca: bytes,
+	cb: bytes,
+	grams_a: Optional[np.ndarray] = None,
+	grams_b: Optional[np.ndarray] = None,
+) -> float:
 	"""
-	Rough similarity score based on normalized serialization overlap.
+	Rough similarity score based on overlap of the canonical serializations
+	`ca`, `cb` (see canon_key), reusing their byte bigrams when given.
 	1.0 means identical under order-insensitive rules.
 	"""
-	ca, cb = normalize_json(a), normalize_json(b)
 	if ca == cb:
 		return 1.0
-	try:
-		sa = orjson.dumps(ca)
-		sb = orjson.dumps(cb)
-	except Exception:
-		sa = json.dumps(ca, sort_keys=True).encode()
-		sb = json.dumps(cb, sort_keys=True).encode()
 	# Jaccard on byte bigrams as a cheap proxy
-	def ngrams(s: bytes, n: int = 2) -> set:
-		return {s[i:i+n] for i in range(max(1, len(s) - n + 1))}
-
-	ga, gb = ngrams(sa), ngrams(sb)
-	if not ga and not gb:
+	ga = byte_bigrams(ca) if grams_a is None else grams_a
+	gb = byte_bigrams(cb) if grams_b is None else grams_b
+	if not ga.size and not gb.size:
 		return 1.0
-	if not ga or not gb:
+	if not ga.size or not gb.size:
 		return 0.0
-	inter = len(ga & gb)
-	union = len(ga | gb)
+	inter = np.intersect1d(ga, gb, assume_unique=True).size
+	union = ga.size + gb.size - inter
 	return inter / union if union else 0.0
 
 
-@st.cache_data
-def cached_similarity_score(a_json: str, b_json: str) -> float:
-	"""Cache similarity score based on JSON string representation"""
-	a = orjson.loads(a_json)
-	b = orjson.loads(b_json)
-	return similarity_score(a, b)
+def load_document(text: str) -> Dict[str, Any]:
+	"""
+	Parse `text` and derive its canonical bytes and byte bigrams once,
+	keeping them in session state keyed on a hash of the text.
+	"""
+	text_hash = xxhash.xxh3_64_intdigest(text.encode())
+	documents = st.session_state.setdefault("documents", {})
+	doc = documents.get(text_hash)
+	if doc is None:
+		parsed, error = try_load_json(text)
+		doc = {"hash": text_hash, "parsed": parsed, "error": error}
+		if parsed is not None:
+			doc["canonical"] = canon_key(parsed)
+			# At most 65,536 packed bigrams, so storing them is cheap
+			doc["bigrams"] = byte_bigrams(doc["canonical"])
+		documents[text_hash] = doc
+	return doc
+
+
+def document_normalized(doc: Dict[str, Any]) -> JsonType:
+	"""Normalized form of a loaded document, computed on first use (only the Raw tab shows it)"""
+	if "normalized" not in doc:
+		doc["normalized"] = normalize_json(doc["parsed"])
+	return doc["normalized"]
+
+
+def _has_nonfinite_float(value: Any) -> bool:
+	"""Whether `value` is or contains a NaN or ±Infinity float"""
+	stack = [value]
+	pop, extend = stack.pop, stack.extend
+	while stack:
+		node = pop()
+		if isinstance(node, dict):
+			extend(node.values())
+		elif isinstance(node, list):
+			extend(node)
+		elif type(node) is float and not math.isfinite(node):
+			return True
+	return False
 
 
 def format_json_value(value: Any, max_length: int = 100) -> str:
 	"""Format JSON value for display in table"""
+	# Common scalars need no serializer at all
+	if value is None:
+		return "null"
+	if value is True:
+		return "true"
+	if value is False:
+		return "false"
+	if type(value) is int:
+		text = str(value)
+		return text[:max_length] + "..." if len(text) > max_length else text
+	# orjson writes NaN and ±Infinity as null, so those go to stdlib json like the Detailed view
+	if not _has_nonfinite_float(value):
+		try:
+			dumped = orjson.dumps(value)
+		except Exception:
+			# orjson rejects e.g. integers wider than 64 bits; stdlib json still renders JSON
+			pass
+		else:
+			if len(dumped) > max_length:
+				return dumped[:max_length].decode("utf-8", "ignore") + "..."
+			return dumped.decode()
 	try:
-		json_str = json.dumps(value, ensure_ascii=False)
-		if len(json_str) > max_length:
-			return json_str[:max_length] + "..."
-		return json_str
+		text = json.dumps(value, ensure_ascii=False)
 	except Exception:
 		return str(value)[:max_length]
+	return text[:max_length] + "..." if len(text) > max_length else text
 
 
 def create_diff_table(diffs: Dict[str, Any], search_filter: str = "") -> pd.DataFrame:
 	"""Create a pandas DataFrame for the differences table"""
-	rows = []
+	# Build columns directly so pandas doesn't have to infer them from row dicts
+	paths, in_base, in_mod, status = [], [], [], []
+	paths_append = paths.append
+	in_base_append = in_base.append
+	in_mod_append = in_mod.append
+	status_append = status.append
+	sf = search_filter.lower()
+	fmt = format_json_value
 	
 	only_a = diffs.get("only_in_a", [])
 	only_b = diffs.get("only_in_b", [])
 	modified = diffs.get("modified", [])
 	
-	for item in only_a:
-		path = item["path"]
-		count = item.get("count", 1)
-		value_str = format_json_value(item["value"])
-		if count > 1:
-			path = f"{path} (×{count})"
-		if not search_filter or search_filter.lower() in (path + value_str).lower():
-			rows.append({
-				"Path": path,
-				"In Base": value_str,
-				"In Modified": "",
-				"Status": "Only in Base"
-			})
+	for _, value, _, path in only_a:
+		value_str = fmt(value)
+		if not sf or sf in (path + value_str).lower():
+			paths_append(path)
+			in_base_append(value_str)
+			in_mod_append("")
+			status_append("Only in Base")
 	
-	for item in only_b:
-		path = item["path"]
-		count = item.get("count", 1)
-		value_str = format_json_value(item["value"])
-		if count > 1:
-			path = f"{path} (×{count})"
-		if not search_filter or search_filter.lower() in (path + value_str).lower():
-			rows.append({
-				"Path": path,
-				"In Base": "",
-				"In Modified": value_str,
-				"Status": "Only in Modified"
-			})
+	for _, value, _, path in only_b:
+		value_str = fmt(value)
+		if not sf or sf in (path + value_str).lower():
+			paths_append(path)
+			in_base_append("")
+			in_mod_append(value_str)
+			status_append("Only in Modified")
 	
-	for item in modified:
-		path = item["path"]
-		value_a_str = format_json_value(item["a"])
-		value_b_str = format_json_value(item["b"])
-		if not search_filter or search_filter.lower() in (path + value_a_str + value_b_str).lower():
-			rows.append({
-				"Path": path,
-				"In Base": value_a_str,
-				"In Modified": value_b_str,
-				"Status": "Modified"
-			})
+	for path, value_a, value_b in modified:
+		value_a_str = fmt(value_a)
+		value_b_str = fmt(value_b)
+		if not sf or sf in (path + value_a_str + value_b_str).lower():
+			paths_append(path)
+			in_base_append(value_a_str)
+			in_mod_append(value_b_str)
+			status_append("Modified")
 	
-	return pd.DataFrame(rows)
+	return pd.DataFrame({"Path": paths, "In Base": in_base, "In Modified": in_mod, "Status": status})
 
 
 def style_diff_table(df: pd.DataFrame):
@@ -291,6 +549,29 @@ def style_diff_table(df: pd.DataFrame):
 	return df.style.apply(row_style, axis=1)
 
 
+def count_elements(obj: JsonType) -> int:
+	"""
+	Count nodes of a JSON value: each dict and scalar is 1, and each list adds
+	its length on top of its items' own counts.
+	"""
+	count = 0
+	stack = [obj]
+	pop, extend = stack.pop, stack.extend
+	while stack:
+		node = pop()
+		if isinstance(node, dict):
+			children = [v for v in node.values() if isinstance(v, (dict, list))]
+			count += 1 + len(node) - len(children)
+			extend(children)
+		elif isinstance(node, list):
+			children = [v for v in node if isinstance(v, (dict, list))]
+			count += 2 * len(node) - len(children)
+			extend(children)
+		else:
+			count += 1
+	return count
+
+
 def render_summary(diffs: Dict[str, Any], common: JsonType, similarity: float):
 	"""Render summary panel with counts"""
 	st.markdown("### Differences Summary")
@@ -303,13 +584,13 @@ def render_summary(diffs: Dict[str, Any], common: JsonType, similarity: float):
 	# Count common elements
 	common_count = 0
 	if common is not None:
-		def count_elements(obj):
-			if isinstance(obj, dict):
-				return 1 + sum(count_elements(v) for v in obj.values())
-			elif isinstance(obj, list):
-				return len(obj) + sum(count_elements(item) for item in obj)
-			return 1
-		common_count = count_elements(common)
+		# `common` lives in session state between reruns, so its id is a stable cache key
+		cached = st.session_state.get("common_count")
+		if cached is not None and cached[0] == id(common):
+			common_count = cached[1]
+		else:
+			common_count = count_elements(common)
+			st.session_state.common_count = (id(common), common_count)
 	
 	col1, col2, col3, col4, col5 = st.columns(5)
 	with col1:
@@ -326,16 +607,14 @@ def render_summary(diffs: Dict[str, Any], common: JsonType, similarity: float):
 	st.markdown("")
 
 
-def render_metrics(a: JsonType, b: JsonType):
-	ca, cb = normalize_json(a), normalize_json(b)
-	score = similarity_score(a, b)
+def render_metrics(ca_bytes: bytes, cb_bytes: bytes, score: float):
 	col1, col2, col3 = st.columns(3)
 	with col1:
 		st.metric("Similarity (0-1)", f"{score:.3f}")
 	with col2:
-		st.metric("Size A (chars)", f"{len(orjson.dumps(ca))}")
+		st.metric("Size A (chars)", f"{len(ca_bytes)}")
 	with col3:
-		st.metric("Size B (chars)", f"{len(orjson.dumps(cb))}")
+		st.metric("Size B (chars)", f"{len(cb_bytes)}")
 
 
 def render_diff(diffs: Dict[str, Any], show_only_diffs: bool = False, search_filter: str = ""):
@@ -376,35 +655,33 @@ def render_diff(diffs: Dict[str, Any], show_only_diffs: bool = False, search_fil
 			if not only_a:
 				st.caption("None")
 			else:
-				for item in only_a:
-					count = item.get("count")
-					suffix = f" ×{count}" if count else ""
-					st.markdown(f"`{item['path']}`{suffix}")
-					st.code(json.dumps(item.get("value"), indent=2, ensure_ascii=False), language="json")
+				for path, value, count, _ in only_a:
+					suffix = f" ×{count}" if count > 1 else ""
+					st.markdown(f"`{path}`{suffix}")
+					st.code(json.dumps(value, indent=2, ensure_ascii=False), language="json")
 		with col_m:
 			st.markdown("**Modified**")
 			if not modified:
 				st.caption("None")
 			else:
-				for item in modified:
-					st.markdown(f"`{item['path']}`")
+				for path, value_a, value_b in modified:
+					st.markdown(f"`{path}`")
 					cols = st.columns(2)
 					with cols[0]:
 						st.caption("Base")
-						st.code(json.dumps(item.get("a"), indent=2, ensure_ascii=False), language="json")
+						st.code(json.dumps(value_a, indent=2, ensure_ascii=False), language="json")
 					with cols[1]:
 						st.caption("Modified")
-						st.code(json.dumps(item.get("b"), indent=2, ensure_ascii=False), language="json")
+						st.code(json.dumps(value_b, indent=2, ensure_ascii=False), language="json")
 		with col_b:
 			st.markdown("**Only in Modified**")
 			if not only_b:
 				st.caption("None")
 			else:
-				for item in only_b:
-					count = item.get("count")
-					suffix = f" ×{count}" if count else ""
-					st.markdown(f"`{item['path']}`{suffix}")
-					st.code(json.dumps(item.get("value"), indent=2, ensure_ascii=False), language="json")
+				for path, value, count, _ in only_b:
+					suffix = f" ×{count}" if count > 1 else ""
+					st.markdown(f"`{path}`{suffix}")
+					st.code(json.dumps(value, indent=2, ensure_ascii=False), language="json")
 
 
 def render_common(common: JsonType, expanded: bool = False):
@@ -519,8 +796,12 @@ def main():
 	
 	# Only process when compare button is clicked
 	if compare_clicked:
-		a, err_a = try_load_json(text_a)
-		b, err_b = try_load_json(text_b)
+		doc_a = load_document(text_a)
+		doc_b = load_document(text_b)
+		# Only keep the documents currently in the editors
+		st.session_state.documents = {doc_a["hash"]: doc_a, doc_b["hash"]: doc_b}
+		a, err_a = doc_a["parsed"], doc_a["error"]
+		b, err_b = doc_b["parsed"], doc_b["error"]
 		
 		if err_a or err_b:
 			st.error(err_a or err_b)
@@ -530,29 +811,31 @@ def main():
 			st.info("Provide both JSON inputs to compare.")
 			return
 
-		# Cache results using JSON string representation
-		a_json_str = orjson.dumps(a).decode()
-		b_json_str = orjson.dumps(b).decode()
+		# Cache results on one key derived from both input text hashes
+		key = hash((doc_a["hash"], doc_b["hash"]))
 		
 		# Calculate metrics and diffs
-		diffs = cached_diff_json(a_json_str, b_json_str)
-		common = cached_intersect_json(a_json_str, b_json_str)
-		similarity = cached_similarity_score(a_json_str, b_json_str)
+		diffs = cached_diff_json(key, a, b)
+		common = cached_intersect_json(key, a, b)
+		similarity = similarity_score(
+			doc_a["canonical"], doc_b["canonical"], doc_a["bigrams"], doc_b["bigrams"]
+		)
 		
 		# Store in session state for use across tabs
 		st.session_state.last_compare = True
 		st.session_state.diffs = diffs
 		st.session_state.common = common
 		st.session_state.similarity = similarity
-		st.session_state.json_a = a
-		st.session_state.json_b = b
+		st.session_state.doc_a = doc_a
+		st.session_state.doc_b = doc_b
 	elif "last_compare" in st.session_state and st.session_state.last_compare:
 		# Show previous results if they exist
 		diffs = st.session_state.diffs
 		common = st.session_state.common
 		similarity = st.session_state.similarity
-		a = st.session_state.json_a
-		b = st.session_state.json_b
+		doc_a = st.session_state.doc_a
+		doc_b = st.session_state.doc_b
+		a, b = doc_a["parsed"], doc_b["parsed"]
 	else:
 		# First time - show prompt
 		st.info("Enter JSON inputs and click 'Compare' to see results.")
@@ -561,7 +844,7 @@ def main():
 	tab_overview, tab_common, tab_diff, tab_raw = st.tabs(["Overview", "Common", "Differences", "Raw"])
 
 	with tab_overview:
-		render_metrics(a, b)
+		render_metrics(doc_a["canonical"], doc_b["canonical"], similarity)
 		st.markdown("\n")
 		st.write("Use the tabs to explore common structure and differences.")
 
@@ -604,10 +887,10 @@ def main():
 			cols2 = st.columns(2)
 			with cols2[0]:
 				st.caption("Base (normalized)")
-				st.json(normalize_json(a), expanded=expanded)
+				st.json(document_normalized(doc_a), expanded=expanded)
 			with cols2[1]:
 				st.caption("Modified (normalized)")
-				st.json(normalize_json(b), expanded=expanded)
+				st.json(document_normalized(doc_b), expanded=expanded)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+# distutils: extra_compile_args = -O3 -march=native
+"""
+Compiled versions of the canonicalization kernels in app.py.
+
+Build in place with `cythonize -i canon.pyx`; app.py uses these when the
+extension is importable. Both functions produce exactly the same results as
+the pure-Python canonical_hash / canon_key, so the two are interchangeable.
+"""
+import json
+
+import orjson
+import xxhash
+
+# Must match the seeds in app.py
+cdef unsigned long long DICT_HASH_SEED = 0x64
+cdef unsigned long long LIST_HASH_SEED = 0x6C
+
+cdef object _orjson_dumps = orjson.dumps
+cdef object _xxh3 = xxhash.xxh3_64_intdigest
+cdef object _SORT_KEYS = orjson.OPT_SORT_KEYS
+
+
+cdef bytes _dumps(object value):
+	try:
+		return _orjson_dumps(value)
+	except Exception:
+		# orjson rejects e.g. integers wider than 64 bits; fall back to stdlib
+		return json.dumps(value, sort_keys=True).encode()
+
+
+cdef bytes _dumps_sorted(object value):
+	try:
+		return _orjson_dumps(value, option=_SORT_KEYS)
+	except Exception:
+		return json.dumps(value, sort_keys=True).encode()
+
+
+cdef inline bint _has_containers(set types):
+	return list in types or dict in types
+
+
+cdef inline bytes _le64(unsigned long long h):
+	cdef unsigned char buf[8]
+	cdef int i
+	for i in range(8):
+		buf[i] = <unsigned char>(h >> (8 * i))
+	return buf[:8]
+
+
+cdef bytes _scalar_list_bytes(list value, set types):
+	if len(types) == 1 and (str in types or int in types):
+		# Equal strs (or ints) are identical, so sorting the values themselves is canonical
+		try:
+			return _orjson_dumps(sorted(value))
+		except Exception:
+			pass
+	return b"\n".join(sorted([_dumps(k) for k in value]))
+
+
+cdef unsigned long long _hash(object value, dict cache) except? 0:
+	cdef unsigned long long total
+	cdef set types
+	cdef dict plain, hashed
+	cdef object k, v, cached, payload
+	if isinstance(value, dict):
+		cached = cache.get(id(value))
+		if cached is not None:
+			return cached
+		types = set(map(type, (<dict>value).values()))
+		if _has_containers(types):
+			plain, hashed = {}, {}
+			for k, v in (<dict>value).items():
+				if isinstance(v, list) or (
+					isinstance(v, dict) and _has_containers(set(map(type, (<dict>v).values())))
+				):
+					hashed[k] = _hash(v, cache)
+				else:
+					plain[k] = v
+			payload = [plain, hashed]
+		else:
+			payload = value
+		total = _xxh3(_dumps_sorted(payload), seed=DICT_HASH_SEED)
+	elif isinstance(value, list):
+		cached = cache.get(id(value))
+		if cached is not None:
+			return cached
+		types = set(map(type, <list>value))
+		if _has_containers(types):
+			total = 0
+			for k in <list>value:
+				# Commutative sum, wrapping at 64 bits
+				total += _hash(k, cache)
+			total = _xxh3(_le64(total), seed=LIST_HASH_SEED)
+		else:
+			total = _xxh3(_scalar_list_bytes(<list>value, types), seed=LIST_HASH_SEED)
+	else:
+		return _xxh3(_dumps(value))
+	cache[id(value)] = total
+	return total
+
+
+def canon_hash(value, cache=None):
+	"""Order-insensitive 64-bit content hash; see app.canonical_hash"""
+	if cache is None:
+		cache = {}
+	return _hash(value, cache)
+
+
+cdef object _normalize(object value):
+	cdef list items
+	cdef object k
+	if isinstance(value, dict):
+		return {k: _normalize((<dict>value)[k]) for k in sorted(value)}
+	if isinstance(value, list):
+		items = [_normalize(k) for k in <list>value]
+		try:
+			items.sort(key=_orjson_dumps)
+		except Exception:
+			items.sort(key=lambda v: _dumps(v))
+		return items
+	return value
+
+
+def canon_bytes(value):
+	"""Canonical serialized bytes of `value`; see app.canon_key"""
+	return _dumps(_normalize(value))
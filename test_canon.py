@@ -0,0 +1,34 @@
+"""Parity of the optional Cython kernels in canon.pyx with the pure-Python code in app.py."""
+import random
+
+import pytest
+
+canon = pytest.importorskip("canon")
+
+import app  # noqa: E402
+
+
+SCALARS = [0, 1, -1, 2**70, 1.0, 2.5, -0.0, 1e20, True, False, None, "", "x", "é\"\\\n"]
+
+
+def random_json(rng: random.Random, depth: int = 0):
+	roll = rng.random()
+	if depth > 4 or roll < 0.3:
+		return rng.choice(SCALARS)
+	if roll < 0.65:
+		return [random_json(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+	return {rng.choice("abcdeé"): random_json(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+
+
+@pytest.fixture
+def pure_python(monkeypatch):
+	monkeypatch.setattr(app, "canon_hash", None)
+	monkeypatch.setattr(app, "canon_bytes", None)
+
+
+def test_canon_matches_pure_python(pure_python):
+	rng = random.Random(0)
+	for _ in range(5000):
+		value = random_json(rng)
+		assert canon.canon_hash(value) == app.canonical_hash(value), value
+		assert canon.canon_bytes(value) == app.canon_key(value), value